@@ -10,7 +10,7 @@ import plotly.graph_objects as go
 import streamlit as st
 
 import data as db
-from engine import list_strategies, load_strategy, run_backtest, calculate_metrics
+from engine import REBALANCE_RULES, STRATEGY_DIR, list_strategies, load_strategy, run_backtest, calculate_metrics
 
 st.set_page_config(page_title="Finance Backtest", layout="wide")
 
@@ -33,8 +33,7 @@ if not strategy_names:
 selected_name = st.sidebar.selectbox("Select Strategy", strategy_names)
 
 with st.sidebar.expander("Strategy source"):
-    from pathlib import Path
-    path = Path("strategies") / f"{selected_name}.py"
+    path = STRATEGY_DIR / f"{selected_name}.py"
     st.code(path.read_text(encoding="utf-8"), language="python")
 
 # Tickers
@@ -49,7 +48,8 @@ if universe_choice == "Custom":
         "Tickers (comma separated)",
         value="AAPL, MSFT, GOOGL, AMZN, META, NVDA, JPM, JNJ, V, WMT",
     )
-    tickers = [t.strip().upper() for t in ticker_input.split(",") if t.strip()]
+    # Order-preserving dedup: "AAPL, aapl" is one ticker, and reruns keep the same order
+    tickers = list(dict.fromkeys(t.strip().upper() for t in ticker_input.split(",") if t.strip()))
 else:
     tickers = universes[universe_choice]
     st.sidebar.caption(f"{len(tickers)} tickers")
@@ -60,7 +60,7 @@ col_a, col_b = st.sidebar.columns(2)
 start_date = col_a.date_input("Start", datetime(2023, 1, 1))
 end_date   = col_b.date_input("End",   datetime(2025, 1, 1))
 initial_capital = st.sidebar.number_input("Initial Capital ($)", value=100_000, step=10_000)
-rebalance_freq  = st.sidebar.selectbox("Rebalance", ["monthly", "weekly"])
+rebalance_freq  = st.sidebar.selectbox("Rebalance", list(REBALANCE_RULES))
 
 # Income
 st.sidebar.header("Income")
@@ -3,18 +3,21 @@ data.py  –  FMP fetch + DuckDB/Parquet data lake
 
 Layout:
   data_lake/
-    fetch_log.parquet        – {ticker, prices_until, fundamentals_at}
+    fetch_log.parquet        – {ticker, prices_from, prices_until, fundamentals_at}
     prices/{TICKER}.parquet  – {date, open, high, low, close, adj_close, volume, ticker}
     financials/{TICKER}.parquet – {ticker, pub_date, period_date, eps_ttm, bvps, ...}
 """
 from __future__ import annotations
 
+import functools
 import json
 import os
 import pathlib
+import threading
 import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import duckdb
@@ -27,9 +30,18 @@ FINS_DIR     = DATA_LAKE / "financials"
 FETCH_LOG    = DATA_LAKE / "fetch_log.parquet"
 UNIVERSE_DIR = pathlib.Path(__file__).parent / "universes"
 FMP_BASE     = "https://financialmodelingprep.com/stable"
+FMP_INTERVAL = 0.3  # min seconds between request starts (free-tier rate limit)
+FMP_WORKERS  = 8    # concurrent downloads in ensure_data
+FUND_TTL     = 90   # days before cached fundamentals are refetched (one quarter)
+FETCH_FUNDAMENTALS = False  # statements endpoints require a paid FMP plan
 
+_rate_lock    = threading.Lock()
+_last_request = 0.0
 
+
+@functools.cache
 def _api_key() -> str:
+    """Resolved once per process; failures are not cached, so a key added later is picked up."""
     try:
         import streamlit as st
         return st.secrets["FMP_API_KEY"]
@@ -43,10 +55,21 @@ def _api_key() -> str:
     return key
 
 
+def _throttle():
+    """Space request starts FMP_INTERVAL apart across all threads; requests may still overlap."""
+    global _last_request
+    with _rate_lock:
+        wait = _last_request + FMP_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
+
+
 def _get(path: str, **params) -> dict | list:
     """GET from FMP stable API. All params passed as query string."""
     qs = "&".join(f"{k}={v}" for k, v in params.items())
     url = f"{FMP_BASE}{path}?{qs}&apikey={_api_key()}" if qs else f"{FMP_BASE}{path}?apikey={_api_key()}"
+    _throttle()
     try:
         with urllib.request.urlopen(url, timeout=30) as r:
             result = json.loads(r.read().decode())
@@ -63,8 +86,6 @@ def _get(path: str, **params) -> dict | list:
         if e.code in (402, 403):
             raise RuntimeError(f"FMP {e.code}: '{path}' not available on free tier") from e
         raise
-    finally:
-        time.sleep(0.3)  # stay within free-tier rate limit
 
 
 # ── universe ──────────────────────────────────────────────────────────────────
@@ -75,12 +96,12 @@ def list_universes() -> dict[str, list[str]]:
     if not UNIVERSE_DIR.exists():
         return result
     for f in sorted(UNIVERSE_DIR.glob("*.txt")):
-        tickers = [
+        tickers = (
             line.strip().upper()
             for line in f.read_text(encoding="utf-8").splitlines()
             if line.strip() and not line.startswith("#")
-        ]
-        result[f.stem] = tickers
+        )
+        result[f.stem] = list(dict.fromkeys(tickers))  # drop repeats, keep file order
     return result
 
 
@@ -96,26 +117,48 @@ def get_db() -> duckdb.DuckDBPyConnection:
 
 # ── fetch log ─────────────────────────────────────────────────────────────────
 
+LOG_COLUMNS = ["ticker", "prices_from", "prices_until", "fundamentals_at"]
+
+
 def _read_fetch_log() -> pd.DataFrame:
     if FETCH_LOG.exists():
-        return pd.read_parquet(FETCH_LOG)
-    return pd.DataFrame(columns=["ticker", "prices_until", "fundamentals_at"])
+        # Logs written before prices_from existed get "" (unknown coverage)
+        return pd.read_parquet(FETCH_LOG).reindex(columns=LOG_COLUMNS, fill_value="")
+    return pd.DataFrame(columns=LOG_COLUMNS)
 
 
-def _update_fetch_log(ticker: str, prices_until: str = None, fundamentals_at: str = None):
+def _update_fetch_log(
+    tickers: list[str],
+    prices_from: str = None,
+    prices_until: str = None,
+    fundamentals_at: str = None,
+):
+    """Record a fetch for every ticker in one read-modify-write of the log.
+
+    Price coverage only ever widens: prices_from keeps the earliest date, prices_until the latest.
+    """
+    if not tickers:
+        return
     df = _read_fetch_log()
-    mask = df["ticker"] == ticker
-    if mask.any():
-        if prices_until:
-            df.loc[mask, "prices_until"] = prices_until
-        if fundamentals_at:
-            df.loc[mask, "fundamentals_at"] = fundamentals_at
-    else:
+    mask = df["ticker"].isin(tickers)
+    if prices_from:
+        cur = df.loc[mask, "prices_from"]
+        df.loc[mask, "prices_from"] = cur.where((cur != "") & (cur <= prices_from), prices_from)
+    if prices_until:
+        cur = df.loc[mask, "prices_until"]
+        df.loc[mask, "prices_until"] = cur.where(cur >= prices_until, prices_until)
+    if fundamentals_at:
+        df.loc[mask, "fundamentals_at"] = fundamentals_at
+
+    known = set(df.loc[mask, "ticker"])
+    new = [t for t in dict.fromkeys(tickers) if t not in known]
+    if new:
         df = pd.concat([df, pd.DataFrame([{
             "ticker":          ticker,
+            "prices_from":     prices_from     or "",
             "prices_until":    prices_until    or "",
             "fundamentals_at": fundamentals_at or "",
-        }])], ignore_index=True)
+        } for ticker in new])], ignore_index=True)
     df.to_parquet(FETCH_LOG, index=False)
 
 
@@ -123,74 +166,116 @@ def _update_fetch_log(ticker: str, prices_until: str = None, fundamentals_at: st
 
 def ensure_data(tickers: list[str], start: str, end: str, conn: duckdb.DuckDBPyConnection):
     """Fetch missing price + fundamental data from FMP and write to Parquet."""
-    log = _read_fetch_log().set_index("ticker")
+    log = _read_fetch_log()
+    # Plain dicts: one pass over the log, then O(1) lookups per ticker
+    covered_from  = dict(zip(log["ticker"], log["prices_from"]))
+    covered_until = dict(zip(log["ticker"], log["prices_until"]))
 
+    # Cached if the log says [start, end] was fetched before; "" means unknown
     to_fetch = [
         t for t in tickers
-        if t not in log.index or (log.loc[t, "prices_until"] or "") < end
+        if (covered_until.get(t) or "") < end
+        or not ("" < covered_from[t] <= start)
     ]
-    if not to_fetch:
+    # Fundamentals age independently of prices: check every requested ticker, not just to_fetch
+    stale = _stale_fundamentals(tickers, log) if FETCH_FUNDAMENTALS else []
+    if not to_fetch and not stale:
         return
 
-    print(f"Fetching {len(to_fetch)} tickers from FMP...")
-    for ticker in to_fetch:
-        _fetch_prices(ticker, start, end)
-        # _fetch_fundamentals(ticker)  # requires paid FMP plan
-
-
-def _fetch_prices(ticker: str, start: str, end: str):
+    print(f"Fetching from FMP: {len(to_fetch)} price histories, {len(stale)} fundamentals...")
+    _api_key()  # resolve st.secrets on the calling thread, not inside the workers
+    # Network-bound: overlap requests across tickers, _get() keeps the rate limit
+    with ThreadPoolExecutor(max_workers=FMP_WORKERS) as pool:
+        ok = list(pool.map(lambda t: _fetch_prices(t, start, end, covered_from.get(t, "")), to_fetch))
+        # Statements change once a quarter: refetch only past FUND_TTL, not on every price fetch
+        fund_ok = list(pool.map(_fetch_fundamentals, stale))
+    fetched = [t for t, done in zip(to_fetch, ok) if done]
+
+    # One log write for the whole batch instead of a rewrite per ticker; workers never
+    # touch the log, so concurrent fetches can't race on its read-modify-write
+    _update_fetch_log(fetched, prices_from=start, prices_until=end)
+    _update_fetch_log(
+        [t for t, done in zip(stale, fund_ok) if done],
+        fundamentals_at=datetime.now().strftime("%Y-%m-%d"),
+    )
+
+
+def _stale_fundamentals(tickers: list[str], log: pd.DataFrame) -> list[str]:
+    """Tickers whose fundamentals were never fetched or are older than FUND_TTL days."""
+    fetched_at = dict(zip(log["ticker"], log["fundamentals_at"]))
+    cutoff = (datetime.now() - pd.Timedelta(days=FUND_TTL)).strftime("%Y-%m-%d")
+    return [t for t in tickers if (fetched_at.get(t) or "") < cutoff]
+
+
+def _fetch_prices(ticker: str, start: str, end: str, covered_from: str = "") -> bool:
+    """Write missing price rows for one ticker. Returns True if [start, end] is now cached."""
     try:
         price_file = PRICES_DIR / f"{ticker}.parquet"
 
-        # Incremental: only fetch what's missing
+        # Incremental: only fetch the date sub-ranges that are missing
         if price_file.exists():
             existing = pd.read_parquet(price_file)
-            last_date = str(existing["date"].max())
-            if last_date >= end:
-                return
-            # Re-fetch from last date to catch retroactive adj_close updates
-            fetch_from = last_date
+            first_date = str(existing["date"].min())
+            last_date  = str(existing["date"].max())
+            ranges = []
+            # Head gap, unless an earlier fetch already showed there is nothing before first_date
+            if start < first_date and not ("" < covered_from <= start):
+                ranges.append((start, first_date))
+            if last_date < end:
+                # Re-fetch from last date to catch retroactive adj_close updates
+                ranges.append((last_date, end))
+            if not ranges:
+                return True
         else:
             existing = pd.DataFrame()
-            fetch_from = start
-
-        # stable API: symbol is a query param, returns a flat array
-        # free tier has no adjClose — store raw close in adj_close column
-        data = _get("/historical-price-eod/full", symbol=ticker, **{"from": fetch_from, "to": end})
-        historical = data if isinstance(data, list) else data.get("historical", [])
-        if not historical:
-            print(f"  {ticker}: no price data")
-            return
-
-        new_df = pd.DataFrame([{
-            "date":      item["date"],
-            "open":      item.get("open"),
-            "high":      item.get("high"),
-            "low":       item.get("low"),
-            "close":     item.get("close"),
-            "adj_close": item.get("adjClose") or item.get("close"),  # adjClose N/A on free tier
-            "volume":    item.get("volume"),
-            "ticker":    ticker,
-        } for item in historical if item.get("close") is not None])
+            ranges = [(start, end)]
 
-        new_df["date"] = pd.to_datetime(new_df["date"]).dt.date
+        parts = [p for p in (_download_prices(ticker, a, b) for a, b in ranges) if not p.empty]
+        if not parts:
+            if existing.empty:
+                print(f"  {ticker}: no price data")
+                return False
+            return True
+        new_df = pd.concat(parts, ignore_index=True)
 
         if not existing.empty:
-            # Drop overlapping dates (re-fetched for adj_close accuracy) then concat
-            existing = existing[existing["date"] < new_df["date"].min()]
-            df = pd.concat([existing, new_df], ignore_index=True)
+            # Overlapping dates were re-fetched for adj_close accuracy: keep the new rows
+            df = pd.concat([existing, new_df], ignore_index=True).drop_duplicates("date", keep="last")
         else:
             df = new_df
-
-        df.sort_values("date").reset_index(drop=True).to_parquet(price_file, index=False)
-        _update_fetch_log(ticker, prices_until=end)
+        df.sort_values("date", ignore_index=True).to_parquet(price_file, index=False)
         print(f"  {ticker}: {len(new_df)} price rows")
+        return True
     except Exception as e:
         print(f"  {ticker} price error: {e}")
+        return False
+
+
+def _download_prices(ticker: str, start: str, end: str) -> pd.DataFrame:
+    """Price rows for one ticker over [start, end]; empty if FMP has none."""
+    # stable API: symbol is a query param, returns a flat array
+    # free tier has no adjClose — store raw close in adj_close column
+    data = _get("/historical-price-eod/full", symbol=ticker, **{"from": start, "to": end})
+    historical = data if isinstance(data, list) else data.get("historical", [])
+
+    new_df = pd.DataFrame([{
+        "date":      item["date"],
+        "open":      item.get("open"),
+        "high":      item.get("high"),
+        "low":       item.get("low"),
+        "close":     item.get("close"),
+        "adj_close": item.get("adjClose") or item.get("close"),  # adjClose N/A on free tier
+        "volume":    item.get("volume"),
+        "ticker":    ticker,
+    } for item in historical if item.get("close") is not None])
+
+    if not new_df.empty:
+        new_df["date"] = pd.to_datetime(new_df["date"]).dt.date
+    return new_df
 
 
-def _fetch_fundamentals(ticker: str):
-    """Fetch quarterly financials from FMP and compute TTM metrics per quarter."""
+def _fetch_fundamentals(ticker: str) -> bool:
+    """Fetch quarterly financials from FMP and compute TTM metrics per quarter. Returns True if written."""
     try:
         income   = _get("/income-statement",        symbol=ticker, period="quarter", limit=20)
         balance  = _get("/balance-sheet-statement", symbol=ticker, period="quarter", limit=20)
@@ -198,146 +283,247 @@ def _fetch_fundamentals(ticker: str):
 
         if not income:
             print(f"  {ticker}: no fundamental data")
-            return
-
-        bal_map = {r["date"]: r for r in balance}
-        cf_map  = {r["date"]: r for r in cashflow}
-
-        income = sorted(income, key=lambda r: r["date"])
-        net_inc_series = [r.get("netIncome") or 0 for r in income]
-        rev_series     = [r.get("revenue")   or 0 for r in income]
-
-        rows = []
-        for i, inc in enumerate(income):
-            period_date = inc["date"]
-            pub_date    = inc.get("filingDate") or inc.get("acceptedDate") or period_date
-
-            bal    = bal_map.get(period_date, {})
-            cf     = cf_map.get(period_date, {})
-            shares = inc.get("weightedAverageShsOut") or None
-            equity = bal.get("totalStockholdersEquity") or None
-            fcf_q  = cf.get("freeCashFlow") or None  # stable API provides this directly
-
-            ttm_start = max(0, i - 3)
-            ttm_inc = sum(net_inc_series[ttm_start : i + 1])
-            ttm_rev = sum(rev_series[ttm_start : i + 1])
-
-            rows.append({
-                "ticker":      ticker,
-                "pub_date":    pub_date,
-                "period_date": period_date,
-                "eps_ttm":     float(ttm_inc / shares) if shares and shares > 0 else None,
-                "bvps":        float(equity  / shares) if shares and shares > 0 and equity else None,
-                "roe_ttm":     float(ttm_inc / equity) if equity and equity > 0 else None,
-                "revenue_ttm": float(ttm_rev) if ttm_rev else None,
-                "fcf_q":       float(fcf_q)   if fcf_q  else None,
-                "shares":      float(shares)  if shares else None,
-            })
-
-        df = pd.DataFrame(rows)
-        df["pub_date"]    = pd.to_datetime(df["pub_date"]).dt.date
+            return False
+
+        # Keep only the fields used from each statement, then join on the quarter date:
+        # one frame sized to the output instead of per-row dict lookups
+        inc = pd.DataFrame(income, columns=[
+            "date", "filingDate", "acceptedDate", "netIncome", "revenue", "weightedAverageShsOut",
+        ]).sort_values("date", ignore_index=True)
+        bal = pd.DataFrame(balance,  columns=["date", "totalStockholdersEquity"])
+        cf  = pd.DataFrame(cashflow, columns=["date", "freeCashFlow"])  # stable API provides FCF directly
+        fin = (
+            inc.merge(bal.drop_duplicates("date", keep="last"), on="date", how="left")
+               .merge(cf.drop_duplicates("date", keep="last"),  on="date", how="left")
+        )
+
+        shares = fin["weightedAverageShsOut"].astype(float)
+        equity = fin["totalStockholdersEquity"].astype(float)
+        fcf_q  = fin["freeCashFlow"].astype(float)
+        pos_sh = shares.where(shares > 0)
+
+        # True trailing-twelve-month sums: NaN until four quarters are available
+        net_inc_ttm = fin["netIncome"].astype(float).fillna(0).rolling(4).sum()
+        rev_ttm     = fin["revenue"].astype(float).fillna(0).rolling(4).sum()
+
+        df = pd.DataFrame({
+            "ticker":      ticker,
+            # first non-empty of filing date, accepted date, period end
+            "pub_date":    fin[["filingDate", "acceptedDate", "date"]].replace("", np.nan).bfill(axis=1).iloc[:, 0],
+            "period_date": fin["date"],
+            "eps_ttm":     net_inc_ttm / pos_sh,
+            "bvps":        equity.where(equity != 0) / pos_sh,
+            "roe_ttm":     net_inc_ttm / equity.where(equity > 0),
+            "revenue_ttm": rev_ttm.where(rev_ttm != 0),
+            "fcf_q":       fcf_q.where(fcf_q != 0),
+            "shares":      shares.where(shares != 0),
+        })
+        df["pub_date"]    = pd.to_datetime(df["pub_date"], format="mixed").dt.date  # acceptedDate has a time
         df["period_date"] = pd.to_datetime(df["period_date"]).dt.date
         df.to_parquet(FINS_DIR / f"{ticker}.parquet", index=False)
-        _update_fetch_log(ticker, fundamentals_at=datetime.now().strftime("%Y-%m-%d"))
-        print(f"  {ticker}: {len(rows)} fundamental rows")
+        print(f"  {ticker}: {len(df)} fundamental rows")
+        return True
     except Exception as e:
         print(f"  {ticker} fundamentals error: {e}")
+        return False
 
 
 # ── read ──────────────────────────────────────────────────────────────────────
 
+MOMENTUM_WINDOWS = [(21, "ret_1m"), (63, "ret_3m"), (126, "ret_6m"), (252, "ret_1y")]
+PRICE_COLUMNS = ["close"] + [col for _, col in MOMENTUM_WINDOWS]
+FUND_COLUMNS = ["eps_ttm", "bvps", "roe_ttm", "revenue_ttm", "fcf_q", "shares"]
+SCREEN_COLUMNS = [
+    *PRICE_COLUMNS,
+    "pe_ratio", "pb_ratio", "ps_ratio", "roe_ttm", "market_cap",
+    "fcf_q", "eps_ttm", "bvps", "shares", "revenue_ttm",
+]
+
+
+def _lake_files(folder: pathlib.Path, tickers: list[str]) -> tuple[tuple[str, int], ...]:
+    """(path, mtime_ns) of each ticker's Parquet file that exists; changes whenever one is rewritten."""
+    files = []
+    for t in dict.fromkeys(tickers):
+        path = folder / f"{t}.parquet"
+        try:
+            files.append((str(path), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            pass
+    return tuple(files)
+
+
 def get_prices(tickers: list[str], start: str, end: str, conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
     """Wide DataFrame: DatetimeIndex × ticker columns (adj_close)."""
-    files = [str(PRICES_DIR / f"{t}.parquet") for t in tickers if (PRICES_DIR / f"{t}.parquet").exists()]
+    files = _lake_files(PRICES_DIR, tickers)
     if not files:
         return pd.DataFrame()
+    # The cached frame itself, not a copy: it is shared with later runs, so callers
+    # must treat it as read-only (derive new frames, never assign into it)
+    return _read_prices(files, start, end, conn)
+
 
-    file_list = ", ".join(f"'{f}'" for f in files)
+@functools.lru_cache(maxsize=8)
+def _read_prices(files: tuple, start: str, end: str, conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    # Keyed on file mtimes: reruns over an unchanged lake skip the Parquet scan
+    file_list = ", ".join(f"'{f}'" for f, _ in files)
+    # Pivot inside DuckDB: only the wide T × N result crosses into pandas, not the
+    # long (date, ticker) table with a string column per row. Columns come out sorted.
     df = conn.execute(f"""
-        SELECT ticker, date, adj_close AS close
-        FROM read_parquet([{file_list}])
-        WHERE date BETWEEN '{start}' AND '{end}'
+        PIVOT (
+            SELECT ticker, date, adj_close AS close
+            FROM read_parquet([{file_list}])
+            WHERE date BETWEEN '{start}' AND '{end}'
+        )
+        ON ticker USING first(close)
+        GROUP BY date
         ORDER BY date
     """).df()
 
     if df.empty:
         return pd.DataFrame()
-    df["date"] = pd.to_datetime(df["date"])
-    return df.pivot(index="date", columns="ticker", values="close").sort_index()
+    df = df.set_index(pd.DatetimeIndex(df.pop("date"), name="date"))
+    df.columns.name = "ticker"
+    return df
+
+
+def get_price_features(prices_wide: pd.DataFrame, dates: pd.DatetimeIndex | None = None) -> pd.DataFrame:
+    """
+    Price columns of the screening frame for many dates and every ticker at once.
+
+    Returns one float32 DataFrame indexed by `dates` (default: every row of prices_wide)
+    with (feature, ticker) columns, features in PRICE_COLUMNS order, each over
+    prices_wide's tickers. Look-backs still count rows of the full daily frame.
+    """
+    prices = prices_wide.to_numpy(dtype=float)
+    if dates is None:
+        dates = prices_wide.index
+    # Only the requested rows are computed: a backtest needs one per rebalance, not per day
+    rows = prices_wide.index.get_indexer(dates)
+
+    # Filled in place and wrapped once: a single block, no concat of per-feature frames.
+    # float32 is ample for screening inputs and halves the panel's memory traffic.
+    panel = np.empty((len(rows), len(PRICE_COLUMNS), prices.shape[1]), dtype=np.float32)
+    panel[:, 0] = prices[rows]
+    for k, (days, _) in enumerate(MOMENTUM_WINDOWS, start=1):
+        # Look back `days` rows, clamped to the first row of the window
+        past = prices[np.maximum(rows - days, 0)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            panel[:, k] = np.where(past > 0, prices[rows] / past - 1, np.nan)
+
+    return pd.DataFrame(
+        panel.reshape(len(rows), -1),
+        index=dates,
+        columns=pd.MultiIndex.from_product([PRICE_COLUMNS, prices_wide.columns]),
+    )
+
+
+def get_fundamentals(tickers: list[str], end: str, conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    """Long DataFrame of every fundamental snapshot published by `end`, sorted by pub_date."""
+    files = _lake_files(FINS_DIR, tickers)
+    if not files:
+        return pd.DataFrame(columns=["ticker", "pub_date", *FUND_COLUMNS])
+    return _read_fundamentals(files, end, conn)   # cached and shared: do not mutate
+
+
+@functools.lru_cache(maxsize=8)
+def _read_fundamentals(files: tuple, end: str, conn: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+    # Keyed on file mtimes, like _read_prices
+    file_list = ", ".join(f"'{f}'" for f, _ in files)
+    df = conn.execute(f"""
+        SELECT *
+        FROM read_parquet([{file_list}])
+        WHERE pub_date <= '{end}'
+        ORDER BY pub_date
+    """).df()
+    df["pub_date"] = pd.to_datetime(df["pub_date"]).astype("datetime64[ns]")
+    df = df.reindex(columns=["ticker", "pub_date", *FUND_COLUMNS])
+    df[FUND_COLUMNS] = df[FUND_COLUMNS].astype("float32")  # screening inputs only, not accounting
+    return df
 
 
 def get_screening_df(
     tickers: list[str],
     as_of: pd.Timestamp,
-    prices_wide: pd.DataFrame,
-    conn: duckdb.DuckDBPyConnection,
+    price_features: pd.DataFrame,
+    fundamentals: pd.DataFrame,
 ) -> pd.DataFrame:
     """
     Build a one-row-per-ticker DataFrame for the strategy signal function.
 
-    Columns available to strategies:
+    `price_features` and `fundamentals` are the get_price_features() and
+    get_fundamentals() frames, built once per backtest.
+
+    Columns available to strategies (always present, NaN where unknown):
         Price:        close, ret_1m, ret_3m, ret_6m, ret_1y
         Fundamental:  pe_ratio, pb_ratio, ps_ratio, roe_ttm,
-                      market_cap, fcf_q, eps_ttm, bvps, shares
+                      market_cap, fcf_q, eps_ttm, bvps, shares, revenue_ttm
     """
-    as_of_str = str(as_of.date())
-    loc = prices_wide.index.get_loc(as_of) if as_of in prices_wide.index else None
-
-    # Batch-fetch latest fundamental snapshot for all tickers in one query
-    fin_files = [str(FINS_DIR / f"{t}.parquet") for t in tickers if (FINS_DIR / f"{t}.parquet").exists()]
-    fund_map: dict[str, dict] = {}
-    if fin_files:
-        file_list = ", ".join(f"'{f}'" for f in fin_files)
-        fund_df = conn.execute(f"""
-            SELECT *
-            FROM read_parquet([{file_list}])
-            WHERE pub_date <= '{as_of_str}'
-            QUALIFY ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY pub_date DESC) = 1
-        """).df()
-        fund_map = {row["ticker"]: row.to_dict() for _, row in fund_df.iterrows()}
-
-    rows: list[dict] = []
-    for ticker in tickers:
-        if ticker not in prices_wide.columns:
-            continue
-        close = prices_wide.iloc[loc][ticker] if loc is not None else np.nan
-        if pd.isna(close):
-            continue
-
-        row: dict = {"ticker": ticker, "close": float(close)}
-
-        # Price momentum
-        if loc is not None:
-            for days, col in [(21, "ret_1m"), (63, "ret_3m"), (126, "ret_6m"), (252, "ret_1y")]:
-                past_loc = max(0, loc - days)
-                past = prices_wide.iloc[past_loc].get(ticker, np.nan)
-                if pd.notna(past) and past > 0:
-                    row[col] = float(close / past - 1)
-
-        # Fundamentals
-        fund = fund_map.get(ticker)
-        if fund:
-            for k in ("eps_ttm", "bvps", "roe_ttm", "revenue_ttm", "fcf_q", "shares"):
-                v = fund.get(k)
-                if v is not None and not (isinstance(v, float) and np.isnan(v)):
-                    row[k] = float(v)
-
-            eps  = row.get("eps_ttm")
-            bvps = row.get("bvps")
-            rev  = row.get("revenue_ttm")
-            sh   = row.get("shares")
-
-            if eps and eps != 0:
-                row["pe_ratio"] = close / eps
-            if bvps and bvps > 0:
-                row["pb_ratio"] = close / bvps
-            if sh:
-                row["market_cap"] = close * sh
-                if rev and rev > 0:
-                    row["ps_ratio"] = close * sh / rev
-
-        rows.append(row)
-
-    if not rows:
-        return pd.DataFrame()
-    return pd.DataFrame(rows).set_index("ticker")
+    return get_screening_frames(tickers, pd.DatetimeIndex([as_of]), price_features, fundamentals)[0]
+
+
+def get_screening_frames(
+    tickers: list[str],
+    dates: pd.DatetimeIndex,
+    price_features: pd.DataFrame,
+    fundamentals: pd.DataFrame,
+) -> list[pd.DataFrame]:
+    """
+    get_screening_df() for many dates at once: one frame per date, in `dates` order.
+
+    All (date, ticker) rows are built together, with a single as-of join against
+    fundamentals and one pass of ratio math, and only split per date at the end.
+    """
+    names = price_features["close"].columns
+    pos = names.get_indexer(tickers)   # one vectorised lookup; -1 = no prices
+    pos = pos[pos >= 0]
+    rows = price_features.index.get_indexer(dates)
+    found = np.flatnonzero(rows >= 0)
+
+    # date × feature × ticker block: the panel rows are feature-major, so a NumPy
+    # reshape replaces the MultiIndex unstack
+    panel = price_features.to_numpy(dtype=float).reshape(len(price_features), len(PRICE_COLUMNS), len(names))
+    block = panel[rows[found]][:, :, pos]
+
+    # Flatten to one long (date, ticker) table, keeping tickers with a close on that date
+    keep = ~np.isnan(block[:, 0, :]).ravel()
+    date_of = np.repeat(found, len(pos))[keep]
+    index   = names[np.tile(pos, len(found))[keep]]
+    cols    = dict(zip(PRICE_COLUMNS, block.transpose(1, 0, 2).reshape(len(PRICE_COLUMNS), -1)[:, keep]))
+
+    # Latest snapshot published on or before each date, per ticker (one sorted as-of join)
+    if fundamentals.empty or not len(index):
+        fund = np.full((len(index), len(FUND_COLUMNS)), np.nan)
+    else:
+        as_of = dates[date_of].to_numpy(dtype="datetime64[ns]")
+        order = np.argsort(as_of, kind="stable")   # merge_asof needs the left keys sorted
+        snap = pd.merge_asof(
+            pd.DataFrame({"ticker": index[order], "as_of": as_of[order]}),
+            fundamentals,
+            left_on="as_of",
+            right_on="pub_date",
+            by="ticker",
+        )
+        fund = np.empty((len(index), len(FUND_COLUMNS)))
+        fund[order] = snap[FUND_COLUMNS].to_numpy(dtype=float)
+    cols.update(zip(FUND_COLUMNS, fund.T))
+
+    # Ratios on raw arrays, guarded in the same expression: no index alignment and no
+    # intermediate Series per operator
+    close, eps, bvps, rev = cols["close"], cols["eps_ttm"], cols["bvps"], cols["revenue_ttm"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["market_cap"] = close * np.where(cols["shares"] != 0, cols["shares"], np.nan)
+        cols["pe_ratio"]   = np.where(eps != 0, close / eps, np.nan)
+        cols["pb_ratio"]   = np.where(bvps > 0, close / bvps, np.nan)
+        cols["ps_ratio"]   = np.where(rev > 0, cols["market_cap"] / rev, np.nan)
+
+    # Rows are grouped by date already: cut the long table at the date boundaries
+    frames = [pd.DataFrame() for _ in dates]
+    starts = np.searchsorted(date_of, found, side="left")
+    ends   = np.searchsorted(date_of, found, side="right")
+    for k, a, b in zip(found, starts, ends):
+        if a < b:
+            frames[k] = pd.DataFrame(
+                {c: cols[c][a:b] for c in SCREEN_COLUMNS},
+                index=pd.Index(index[a:b], name="ticker"),
+            )
+    return frames
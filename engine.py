@@ -9,15 +9,19 @@ Simple model:
 """
 from __future__ import annotations
 
+import functools
+import hashlib
 import importlib.util
 import pathlib
+import threading
 import types
+from concurrent.futures import ProcessPoolExecutor
 
 import duckdb
 import numpy as np
 import pandas as pd
 
-from data import get_prices, get_screening_df
+from data import get_db, get_fundamentals, get_price_features, get_prices, get_screening_frames
 
 
 # ── strategy loading ──────────────────────────────────────────────────────────
@@ -35,8 +39,13 @@ def list_strategies() -> list[str]:
 
 
 def load_strategy(name: str) -> types.ModuleType:
-    """Import a strategy file and return the module."""
+    """Import a strategy file and return the module (re-imported only when the file changes)."""
     path = STRATEGY_DIR / f"{name}.py"
+    return _import_strategy(name, path, path.stat().st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=64)
+def _import_strategy(name: str, path: pathlib.Path, mtime_ns: int) -> types.ModuleType:
     spec = importlib.util.spec_from_file_location(name, path)
     mod = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(mod)
@@ -45,6 +54,22 @@ def load_strategy(name: str) -> types.ModuleType:
 
 # ── backtest ──────────────────────────────────────────────────────────────────
 
+def _month_starts(dates: pd.DatetimeIndex) -> np.ndarray:
+    """First trading day of each month (and the first day overall)."""
+    return np.r_[True, dates.month[1:] != dates.month[:-1]]
+
+
+def _week_starts(dates: pd.DatetimeIndex) -> np.ndarray:
+    """First trading day of each ISO week (and the first day overall)."""
+    week = dates.isocalendar().week.to_numpy()
+    return np.r_[True, week[1:] != week[:-1]]
+
+
+REBALANCE_RULES = {"monthly": _month_starts, "weekly": _week_starts}
+
+EVENT_COLUMNS = ["date", "type", "label", "ticker", "amount", "shares", "price", "gain"]
+
+
 def run_backtest(
     strategy: types.ModuleType,
     tickers: list[str],
@@ -66,124 +91,227 @@ def run_backtest(
     prices = get_prices(tickers, start, end, conn)
     if prices.empty:
         return pd.DataFrame(), pd.DataFrame()
+    # Tickers without prices can never trade: drop them once, not in every loop below
+    tickers = [t for t in dict.fromkeys(tickers) if t in prices.columns]
+    fundamentals = get_fundamentals(tickers, end, conn)
 
     # Pre-sort expenses by date for fast lookup
     exp_lookup: dict[str, list[dict]] = {}
     for e in expenses:
         exp_lookup.setdefault(e["date"], []).append(e)
 
-    # Determine rebalance dates
-    rebalance_dates: set[pd.Timestamp] = {prices.index[0]}
-    for prev, curr in zip(prices.index, prices.index[1:]):
-        if rebalance_freq == "monthly" and curr.month != prev.month:
-            rebalance_dates.add(curr)
-        elif rebalance_freq == "weekly" and curr.isocalendar()[1] != prev.isocalendar()[1]:
-            rebalance_dates.add(curr)
+    # Determine rebalance dates: one table lookup picks the rule, no per-frequency branching
+    dates = prices.index
+    rule = REBALANCE_RULES.get(rebalance_freq)
+    rebalance_mask = rule(dates) if rule else np.arange(len(dates)) == 0   # unknown: first day only
+    rebalance_idx = dates[rebalance_mask]
+
+    # Screening inputs are only read on rebalance dates, so only those rows are built
+    features = get_price_features(prices, rebalance_idx)
+
+    # Selection never depends on portfolio state, so screen every rebalance date up front
+    selected = _selection_matrix(strategy, tickers, rebalance_idx, features, fundamentals)
+
+    # Prices as a plain T × N array in `tickers` order; rows are read by position.
+    # Kept float64: these feed cash and cost-basis accounting, where float32 rounding
+    # would compound over years of trades (screening inputs are float32 already)
+    price_matrix = prices[tickers].to_numpy(dtype=np.float64)
+
+    # Event-driven: cash only moves on income, expense and rebalance days, and holdings
+    # only on rebalance days, so the loop visits those days and nothing else
+    income_mask = _month_starts(dates) & (monthly_income > 0)   # 1st trading day of a month
+    expense_mask = dates.isin(pd.to_datetime(list(exp_lookup)))
+    event_idx = np.flatnonzero(rebalance_mask | income_mask | expense_mask)
+    date_strs = dates.strftime("%Y-%m-%d")   # formatted once, not per event day
 
     # State
     cash = float(initial_capital)
-    shares: dict[str, float] = {t: 0.0 for t in tickers}
-    avg_cost: dict[str, float] = {t: 0.0 for t in tickers}  # average cost per share
+    shares = np.zeros(len(tickers))                          # held shares per ticker column
+    avg_cost = np.zeros(len(tickers))                        # average cost per share
 
     cum_income = cum_expenses = 0.0
-    equity_rows: list[dict] = []
-    event_rows: list[dict] = []
+    # Event log kept column-wise: one list per field instead of a dict per event
+    events: dict[str, list] = {c: [] for c in EVENT_COLUMNS}
 
-    def portfolio_value(dt: pd.Timestamp) -> float:
-        return sum(
-            shares[t] * prices.loc[dt, t]
-            for t in tickers
-            if shares[t] > 0 and t in prices.columns and pd.notna(prices.loc[dt, t])
-        )
+    def log_event(date, kind, label, ticker=None, amount=None, qty=None, price=None, gain=None):
+        for c, v in zip(EVENT_COLUMNS, (date, kind, label, ticker, amount, qty, price, gain)):
+            events[c].append(v)
 
-    prev_dt: pd.Timestamp | None = None
+    # Ledger values after each event day, forward-filled to every day once the loop is done
+    cash_at = np.full(len(dates), cash)
+    income_at = np.zeros(len(dates))
+    expenses_at = np.zeros(len(dates))
+    held_from: list[int] = []            # day index where each holdings snapshot starts
+    held: list[np.ndarray] = []
+    r = 0                                # row of `selected` for the next rebalance
 
-    for dt in prices.index:
-        dt_str = str(dt.date())
+    for i in event_idx:
+        dt_str = date_strs[i]
+        px = price_matrix[i]
 
         # Monthly income (credit on 1st trading day of each month)
-        if monthly_income > 0 and (prev_dt is None or dt.month != prev_dt.month):
+        if income_mask[i]:
             cash += monthly_income
             cum_income += monthly_income
-            event_rows.append(dict(date=dt_str, type="income", label="Monthly income",
-                                   ticker=None, amount=monthly_income,
-                                   shares=None, price=None, gain=None))
+            log_event(dt_str, "income", "Monthly income", amount=monthly_income)
 
         # One-time expenses
         for exp in exp_lookup.get(dt_str, []):
             cash -= exp["amount"]
             cum_expenses += exp["amount"]
-            event_rows.append(dict(date=dt_str, type="expense", label=exp["label"],
-                                   ticker=None, amount=-exp["amount"],
-                                   shares=None, price=None, gain=None))
+            log_event(dt_str, "expense", exp["label"], amount=-exp["amount"])
 
         # Rebalance
-        if dt in rebalance_dates:
-            screen = get_screening_df(tickers, dt, prices, conn)
-
-            if screen.empty:
-                selected: list[str] = []
-            else:
-                try:
-                    mask = strategy.signal(screen)
-                    selected = screen[mask].index.tolist()
-                except Exception as e:
-                    raise RuntimeError(
-                        f"Strategy '{getattr(strategy, 'NAME', strategy.__name__)}' "
-                        f"raised an error on {dt_str}:\n{e}"
-                    ) from e
-
-            currently_held = {t for t in tickers if shares[t] > 0.001}
-            new_selected   = set(selected)
-            to_sell = currently_held - new_selected   # exited selection → sell all
-            to_buy  = new_selected - currently_held   # entered selection → buy
-
-            # Sell exits (full position close)
-            sell_proceeds = 0.0
-            for ticker in to_sell:
-                price = prices.loc[dt, ticker] if ticker in prices.columns else np.nan
-                if pd.isna(price):
-                    continue
-                sh_sell = shares[ticker]
-                gain = sh_sell * (price - avg_cost[ticker])
+        if rebalance_mask[i]:
+            picked = selected[r]
+            r += 1
+            held_mask = shares > 0.001
+            to_buy = np.flatnonzero(picked & ~held_mask)   # entered selection → buy
+
+            # Sell exits (full position close), all at once: exited selection and quoted today
+            sell = np.flatnonzero(held_mask & ~picked & ~np.isnan(px))
+            if sell.size:
+                sh_sell = shares[sell]
+                price = px[sell]
                 proceeds = sh_sell * price
-                cash += proceeds
-                sell_proceeds += proceeds
-                shares[ticker] = 0.0
-                avg_cost[ticker] = 0.0
-                event_rows.append(dict(date=dt_str, type="trade", label="Sell",
-                                      ticker=ticker, amount=proceeds,
-                                      shares=-sh_sell, price=price, gain=round(gain, 2)))
+                gain = sh_sell * (price - avg_cost[sell])
+                cash += proceeds.sum()
+                shares[sell] = avg_cost[sell] = 0.0
+                for k, j in enumerate(sell):
+                    log_event(dt_str, "trade", "Sell", tickers[j], proceeds[k],
+                              -sh_sell[k], price[k], round(gain[k], 2))
 
             # Buy entries: split all available cash equally (includes sell proceeds + accumulated income)
-            if to_buy:
-                per_stock = cash / len(to_buy)
-                for ticker in sorted(to_buy):   # sorted for determinism
-                    price = prices.loc[dt, ticker] if ticker in prices.columns else np.nan
-                    if pd.isna(price):
+            if to_buy.size:
+                per_stock = cash / to_buy.size
+                for j in sorted(to_buy, key=tickers.__getitem__):   # by ticker, for determinism
+                    price = px[j]
+                    if np.isnan(price):
                         continue
                     buy_val = min(per_stock, cash)
                     if buy_val <= 0.01:
                         continue
                     sh_buy = buy_val / price
-                    total_sh = shares[ticker] + sh_buy
-                    avg_cost[ticker] = (
-                        (shares[ticker] * avg_cost[ticker] + sh_buy * price) / total_sh
-                    )
-                    shares[ticker] = total_sh
+                    total_sh = shares[j] + sh_buy
+                    avg_cost[j] = (shares[j] * avg_cost[j] + sh_buy * price) / total_sh
+                    shares[j] = total_sh
                     cash -= buy_val
-                    event_rows.append(dict(date=dt_str, type="trade", label="Buy",
-                                          ticker=ticker, amount=buy_val,
-                                          shares=sh_buy, price=price, gain=None))
+                    log_event(dt_str, "trade", "Buy", tickers[j], buy_val, sh_buy, price)
+
+            # Holdings only change when something was traded: unchanged or empty
+            # selections keep the current segment instead of snapshotting a copy
+            if sell.size or to_buy.size:
+                held_from.append(i)
+                held.append(shares.copy())
+
+        cash_at[i], income_at[i], expenses_at[i] = cash, cum_income, cum_expenses
+
+    # Forward-fill the ledger: each day takes the values of the latest event on or before it
+    last = np.zeros(len(dates), dtype=np.intp)
+    last[event_idx] = event_idx
+    last = np.maximum.accumulate(last)
+
+    # Mark to market one holdings segment at a time, reading only the held columns rather
+    # than the whole T × N block; NaN prices (no quote) contribute nothing
+    portfolio = np.zeros(len(dates))
+    for a, b, sh in zip(held_from, held_from[1:] + [len(dates)], held):
+        nz = np.flatnonzero(sh)
+        portfolio[a:b] = np.nansum(price_matrix[a:b, nz] * sh[nz], axis=1)
+
+    cash_col = cash_at[last]
+    equity_df = pd.DataFrame({
+        "cash":         cash_col,
+        "portfolio":    portfolio,
+        "net_worth":    cash_col + portfolio,
+        "cum_income":   income_at[last],
+        "cum_expenses": expenses_at[last],
+    }, index=dates.rename("date"))
+    events_df = pd.DataFrame(events) if events["date"] else pd.DataFrame()
+    return equity_df, events_df
 
-        pv = portfolio_value(dt)
-        equity_rows.append(dict(date=dt, cash=cash, portfolio=pv, net_worth=cash + pv,
-                                cum_income=cum_income, cum_expenses=cum_expenses))
-        prev_dt = dt
 
-    equity_df = pd.DataFrame(equity_rows).set_index("date")
-    events_df = pd.DataFrame(event_rows) if event_rows else pd.DataFrame()
-    return equity_df, events_df
+def run_backtests(
+    strategy_names: list[str],
+    workers: int | None = None,
+    **kwargs,
+) -> dict[str, tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Backtest several strategies side by side, one worker process each.
+
+    Runs are independent, so they spread across cores. `kwargs` are run_backtest's
+    arguments minus `strategy` and `conn`. Returns {name: (equity_df, events_df)}.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(functools.partial(_run_named, **kwargs), strategy_names)
+        return dict(zip(strategy_names, results))
+
+
+def _run_named(name: str, **kwargs) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Modules and DuckDB connections don't pickle: each worker loads and opens its own
+    return run_backtest(load_strategy(name), conn=get_db(), **kwargs)
+
+
+SELECTION_CACHE_SIZE = 32
+_selections: dict[tuple, np.ndarray] = {}   # insertion-ordered: first key is the oldest
+_selections_lock = threading.Lock()         # Streamlit runs each session on its own thread
+
+
+def _selection_matrix(
+    strategy: types.ModuleType,
+    tickers: list[str],
+    rebalance_dates: pd.DatetimeIndex,
+    features: pd.DataFrame,
+    fundamentals: pd.DataFrame,
+) -> np.ndarray:
+    """Run the strategy signal on every rebalance date: bool [n_rebalances, n_tickers].
+
+    Memoized on the strategy module and a content hash of its inputs, so re-running
+    a strategy over unchanged data (other income, expenses or capital) skips screening.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(rebalance_dates.asi8.tobytes())
+    digest.update(features.to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(fundamentals, index=False).to_numpy().tobytes())
+    key = (strategy, tuple(tickers), tuple(features["close"].columns), digest.digest())
+    with _selections_lock:
+        if key in _selections:
+            return _selections[key]
+
+    # Screen outside the lock: a slow strategy must not block other sessions
+    selected = _select(strategy, tickers, rebalance_dates, features, fundamentals)
+    selected.flags.writeable = False   # shared between runs: read-only
+    with _selections_lock:
+        _selections[key] = selected
+        if len(_selections) > SELECTION_CACHE_SIZE:
+            _selections.pop(next(iter(_selections)), None)   # oldest first
+    return selected
+
+
+def _select(
+    strategy: types.ModuleType,
+    tickers: list[str],
+    rebalance_dates: pd.DatetimeIndex,
+    features: pd.DataFrame,
+    fundamentals: pd.DataFrame,
+) -> np.ndarray:
+    names = pd.Index(tickers)   # its hash table is built once and reused for every date
+    selected = np.zeros((len(rebalance_dates), len(tickers)), dtype=bool)
+    screens = get_screening_frames(tickers, rebalance_dates, features, fundamentals)
+    for r, (dt, screen) in enumerate(zip(rebalance_dates, screens)):
+        if screen.empty:
+            continue
+        try:
+            mask = strategy.signal(screen)
+            # screen[mask] semantics (arrays, lists, NA as False, misaligned masks raise)
+            # on the index alone, without materialising the filtered frame
+            picked = screen.index.to_series()[mask].index
+            selected[r, names.get_indexer(picked)] = True   # picked ⊆ screen.index ⊆ tickers
+        except Exception as e:
+            raise RuntimeError(
+                f"Strategy '{getattr(strategy, 'NAME', strategy.__name__)}' "
+                f"raised an error on {dt.date()}:\n{e}"
+            ) from e
+    return selected
 
 
 def calculate_metrics(equity_df: pd.DataFrame, initial_capital: float) -> dict:
@@ -194,10 +322,15 @@ def calculate_metrics(equity_df: pd.DataFrame, initial_capital: float) -> dict:
     days = (equity_df.index[-1] - equity_df.index[0]).days
     years = days / 365.25
     cagr = (end_val / start_val) ** (1 / years) - 1 if years > 0 and start_val > 0 else 0.0
-    rolling_max = nw.cummax()
-    max_dd = float(((nw - rolling_max) / rolling_max).min())
-    ret = nw.pct_change().dropna()
-    sharpe = float(ret.mean() / ret.std() * np.sqrt(252)) if ret.std() > 0 else 0.0
+    # Drawdown and daily returns on the raw array: no index alignment or intermediate Series
+    v = nw.to_numpy(dtype=np.float64)
+    rolling_max = np.maximum.accumulate(v)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_dd = float(np.fmin.reduce((v - rolling_max) / rolling_max))   # skips NaN like Series.min
+        ret = np.diff(v) / v[:-1]
+        ret = ret[~np.isnan(ret)]   # 0/0 days, as pct_change().dropna() skipped them
+        std = ret.std(ddof=1) if ret.size > 1 else 0.0
+        sharpe = float(ret.mean() / std * np.sqrt(252)) if std > 0 else 0.0
     return {
         "Final Net Worth":   end_val,
         "Total Return":      (end_val - start_val) / start_val,
@@ -13,7 +13,7 @@ TOP_N = 5
 
 
 def signal(df: pd.DataFrame) -> pd.Series:
-    if "ret_6m" not in df.columns:
+    if df["ret_6m"].isna().all():
         # Fallback: select nothing if we don't have enough history yet
         return pd.Series(False, index=df.index)
 